@@ -8,94 +8,781 @@ Options:
     --only-console       Show only console logs, no HTML
     --screenshot FILE    Save a screenshot to FILE (PNG format)
     --only-screenshot    Only take screenshot, no HTML output
-    --wait N             Wait N seconds for JS to render (default: 5)
+    --wait N             Wait up to N seconds for JS to render (default: 5)
+    --wait-for SEL       Finish waiting as soon as an element matching CSS SELector exists
+    --wait-strategy S    When rendering is done: ready (document loaded, default),
+                         networkidle (loaded + no new requests for 0.5s) or fixed (sleep --wait)
+    --force-wait         Same as --wait-strategy fixed
+    --page-load-strategy S
+                         When navigation returns: eager (DOMContentLoaded, default),
+                         normal (load event) or none (immediately)
     --width W            Browser viewport width (default: 1280)
     --height H           Browser viewport height (default: 900)
     --exec-js CODE       Execute JavaScript after page load (before wait)
-    --exec-js-file FILE  Execute JavaScript from file after page load
+    --exec-js-file FILE  Execute JavaScript from file after page load (instead of --exec-js)
     --post-js CODE       Execute JavaScript after wait completes
-    --post-js-file FILE  Execute JavaScript from file after wait
-    --post-wait N        Wait N seconds after post-js (for navigation, etc.)
+    --post-js-file FILE  Execute JavaScript from file after wait (instead of --post-js)
+    --post-wait N        Wait up to N seconds after click/post-js for navigation to finish
     --network-log        Capture and display network requests (performance log)
     --only-network       Show only network requests, no HTML
     --type SEL::VALUE    Type VALUE into element matching CSS SELector (can repeat)
     --click SEL          Click element matching CSS SELector (can repeat)
+    --native-typing      Type into each field with real key events through WebDriver
+                         (default: fields that are ready are filled in one JavaScript call)
     --profile DIR        Use persistent Chrome profile directory (for session persistence)
     --timeout N          Hard wall-clock timeout in seconds for the entire operation (default: 60)
+    --no-images          Don't load images, even for --screenshot (always off without one)
+    --no-cache           Don't use the persistent HTTP cache ($JSWR_CACHE)
+    --fast               Also disable Chrome timer throttling/feature probes (~20% faster renders)
+    --daemon             Render through js-web-renderer-daemon (used automatically if it is running)
 """
 import sys
 import os
-import pwd
 if "XDG_RUNTIME_DIR" not in os.environ:
     os.environ["XDG_RUNTIME_DIR"] = f"/run/user/{os.getuid()}"
 import json
+import mmap
+import atexit
+import signal
+import functools
 import threading
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import queue
+import concurrent.futures
 import time
+# orjson (optional) decodes the performance log several times faster
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+# Selenium is imported inside the functions that drive Chrome: it takes a
+# noticeable fraction of a second to load and --help, argument errors and
+# daemon-client runs never need it. argparse and socket are likewise imported
+# where they are used, after the --help check and only for daemon clients.
 
+# Unix socket of bin/js-web-renderer-daemon.py (warm Chrome instances)
+DAEMON_SOCKET = os.path.join(os.environ["XDG_RUNTIME_DIR"], "js-web-renderer.sock")
 
-def _build_chrome_options(width, height, capture_console, capture_network, profile_dir):
+# Always on: browser subsystems a one-shot headless render never uses. Skipping
+# them makes Chrome start faster and use less memory; pages render the same.
+CHROME_BASE_ARGS = (
+    "--headless",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-extensions",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--metrics-recording-only",
+    "--mute-audio",
+)
+CHROME_DISABLED_FEATURES = (
+    "Translate",
+    "OptimizationHints",
+    "MediaRouter",
+    "InterestFeedContentSuggestions",
+    "BackForwardCache",
+)
+
+# --fast: also switch off throttling and probes that change how the page runs,
+# in exchange for less renderer CPU. Saves roughly 20-25% wall time per render.
+CHROME_PERF_ARGS = (
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-ipc-flooding-protection",
+)
+CHROME_PERF_DISABLED_FEATURES = ("AcceptCHFrame",)
+
+
+# Perform --type actions in the page in one round-trip, in order. Stops at the
+# first field that is missing (it may not have rendered yet), disabled, hidden
+# or has no value property (contenteditable and the like), and returns how
+# many were typed; the caller finishes the rest with WebDriver, which waits
+# for the elements. Clicks always go through WebDriver: a button may only be
+# enabled once the page has handled these input events, and a click that
+# navigates would leave later actions running against the old document.
+BATCH_TYPE_JS = """
+var types = arguments[0];
+for (var i = 0; i < types.length; i++) {
+    var e = document.querySelector(types[i][0]);
+    if (!e || e.disabled || e.readOnly || !e.getClientRects().length) return i;
+    // Assign through the prototype's setter: React tracks input values by
+    // wrapping the instance property and would ignore a plain e.value = ...
+    var desc = null;
+    for (var p = Object.getPrototypeOf(e); p && !desc; p = Object.getPrototypeOf(p)) {
+        desc = Object.getOwnPropertyDescriptor(p, 'value');
+    }
+    if (!desc || !desc.set) return i;
+    e.focus();
+    desc.set.call(e, types[i][1]);
+    e.dispatchEvent(new Event('input', {bubbles: true}));
+    e.dispatchEvent(new Event('change', {bubbles: true}));
+}
+return types.length;
+"""
+
+
+# output_mode -> what that CLI output mode prints. Anything else would be
+# thrown away, so it is not collected. output_mode=None collects everything.
+OUTPUT_MODES = {
+    "html": ("html", "console", "network"),
+    "console": ("console",),
+    "network": ("network",),
+    "screenshot": (),
+}
+
+
+def _keeps(output_mode, what):
+    return output_mode is None or what in OUTPUT_MODES[output_mode]
+
+
+def _chrome_config(kwargs):
+    """The fetch kwargs that are fixed when Chrome launches, as a hashable tuple
+    in _build_chrome_options() argument order."""
+    output_mode = kwargs.get("output_mode")
+    return (
+        kwargs.get("width", 1280),
+        kwargs.get("height", 900),
+        bool(kwargs.get("capture_console", False)) and _keeps(output_mode, "console"),
+        bool(kwargs.get("capture_network", False)) and _keeps(output_mode, "network"),
+        kwargs.get("profile_dir", None),
+        bool(kwargs.get("fast", False)),
+        # Images only matter for screenshots
+        bool(kwargs.get("screenshot_path")) and not kwargs.get("no_images", False),
+        not kwargs.get("no_cache", False),
+        kwargs.get("page_load_strategy", "eager"),
+    )
+
+
+def _http_cache_dir():
+    return os.environ.get(
+        "JSWR_CACHE", os.path.join(os.environ["XDG_RUNTIME_DIR"], "js-web-renderer-cache"))
+
+
+# Number of cache directories under _http_cache_dir(), i.e. of browsers that
+# can use the persistent HTTP cache at the same time
+_CACHE_SLOTS = 32
+
+_CREATED_DIRS = set()
+
+
+def _ensure_dir(path):
+    """os.makedirs(path, exist_ok=True), once per directory per process."""
+    if path not in _CREATED_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _CREATED_DIRS.add(path)
+
+
+def _claim_cache_dir():
+    """
+    Lock a persistent HTTP cache directory that no other running browser uses.
+    Chromium's disk cache assumes it is the only user of its directory, so
+    concurrent browsers (pooled ones, other CLI runs) each get their own slot.
+
+    Returns (path, lock fd), or (None, None) if every slot is taken. The slot is
+    held until the fd is closed or the process exits.
+    """
+    import fcntl
+
+    base = _http_cache_dir()
+    _ensure_dir(base)
+    for slot in range(_CACHE_SLOTS):
+        fd = os.open(os.path.join(base, f"{slot}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            continue
+        path = os.path.join(base, str(slot))
+        _ensure_dir(path)
+        return path, fd
+    return None, None
+
+
+@functools.lru_cache(maxsize=32)
+def _chrome_args(width, height, capture_console, capture_network, profile_dir,
+                 fast=False, load_images=True, use_cache=True):
+    """The command-line arguments, content-settings prefs and logging prefs for
+    a launch configuration. Cached: Options objects are mutable, so callers get
+    a fresh one from _build_chrome_options() and only the inputs are shared."""
+    args = list(CHROME_BASE_ARGS)
+    args.append(f"--window-size={width},{height}")
+    # Chrome only honours the last --disable-features, so pass one combined list
+    disabled_features = CHROME_DISABLED_FEATURES
+    if fast:
+        args.extend(CHROME_PERF_ARGS)
+        disabled_features += CHROME_PERF_DISABLED_FEATURES
+    args.append("--disable-features=" + ",".join(disabled_features))
+
+    # Skip downloading and decoding images nobody will look at
+    prefs = ()
+    if not load_images:
+        prefs = (
+            ("profile.managed_default_content_settings.images", 2),
+            ("profile.default_content_setting_values.notifications", 2),
+        )
+        args.append("--blink-settings=imagesEnabled=false")
+
+    # The persistent HTTP cache directory differs per running browser, so
+    # _launch_driver() adds it (see _claim_cache_dir())
+    if not use_cache:
+        args.append("--disk-cache-dir=/dev/null")
+        args.append("--disk-cache-size=1")
+
+    if profile_dir:
+        args.append(f"--user-data-dir={profile_dir}")
+
+    logging_prefs = ()
+    if capture_console:
+        logging_prefs += (("browser", "ALL"),)
+    if capture_network:
+        logging_prefs += (("performance", "ALL"),)
+
+    return tuple(args), prefs, logging_prefs
+
+
+def _build_chrome_options(width, height, capture_console, capture_network, profile_dir,
+                          fast=False, load_images=True, use_cache=True, page_load_strategy="eager"):
     """Build Chrome options — separated out so both fetch_rendered and the timeout
     wrapper can create a driver consistently."""
+    from selenium.webdriver.chrome.options import Options
+
+    args, prefs, logging_prefs = _chrome_args(
+        width, height, capture_console, capture_network, profile_dir,
+        fast, load_images, use_cache)
+
     chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument(f"--window-size={width},{height}")
+    # "eager": driver.get() returns at DOMContentLoaded; the render wait then
+    # decides how much of the rest of the load to wait for
+    chrome_options.page_load_strategy = page_load_strategy
+    for arg in args:
+        chrome_options.add_argument(arg)
+    if prefs:
+        chrome_options.add_experimental_option("prefs", dict(prefs))
+    if logging_prefs:
+        chrome_options.set_capability("goog:loggingPrefs", dict(logging_prefs))
+    if capture_network:
+        # Only Network events reach the performance log; the Page domain's
+        # events would otherwise outnumber them and just be filtered out again
+        chrome_options.add_experimental_option("perfLoggingPrefs", {
+            "enableNetwork": True,
+            "enablePage": False,
+        })
 
     if profile_dir:
-        os.makedirs(profile_dir, exist_ok=True)
-        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+        _ensure_dir(profile_dir)
         print(f"[profile] Using {profile_dir}", file=sys.stderr)
 
-    logging_prefs = {}
+    return chrome_options
+
+
+def _stderr(line):
+    print(line, file=sys.stderr)
+
+
+def _flush_log(lines):
+    """Write buffered log lines to stderr in one call."""
+    if lines:
+        sys.stderr.write("\n".join(lines) + "\n")
+        sys.stderr.flush()
+
+
+def _write_file(path, data):
+    """Write bytes to path with raw os.write() calls — no buffered-writer copy."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _launch_driver(config):
+    """Start Chrome for a _chrome_config() tuple."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    # Own session (and so process group) for chromedriver and the Chrome
+    # processes it starts, so _kill_driver() can take them all down at once
+    service = Service("/snap/bin/chromium.chromedriver",
+                      popen_kw={"start_new_session": True})
+    options = _build_chrome_options(*config)
+
+    # Keep the HTTP cache between runs so repeat loads revalidate (304) instead of
+    # re-downloading every asset. A --profile already has its own cache inside it.
+    profile_dir, use_cache = config[4], config[7]
+    cache_lock = None
+    if use_cache and not profile_dir:
+        cache_dir, cache_lock = _claim_cache_dir()
+        if cache_dir:
+            options.add_argument(f"--disk-cache-dir={cache_dir}")
+            options.add_argument("--disk-cache-size=536870912")  # 512MB
+
+    try:
+        driver = webdriver.Chrome(service=service, options=options)
+    except BaseException:
+        if cache_lock is not None:
+            os.close(cache_lock)
+        raise
+    # Released by _quit_driver()
+    driver._jswr_cache_lock = cache_lock
+    with _POOL_LOCK:
+        _LIVE_DRIVERS.add(driver)
+    return driver
+
+
+def _kill_driver(driver):
+    """SIGKILL chromedriver together with Chrome and its renderer processes."""
+    process = driver.service.process
+    try:
+        # _launch_driver() made chromedriver a process group leader. The pid is
+        # used directly rather than os.getpgid(): for a caller-supplied driver
+        # that would be the caller's own group. Such a driver has no group of
+        # its own, so this fails and only chromedriver is killed below.
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        process.kill()
+
+
+def _quit_driver(driver):
+    with _POOL_LOCK:
+        _LIVE_DRIVERS.discard(driver)
+    try:
+        driver.quit()
+    except Exception:
+        pass
+    # Free the browser's HTTP cache slot. dict.pop() is atomic, so a driver
+    # quit from two threads (timeout path and worker) closes the fd once.
+    cache_lock = getattr(driver, "__dict__", {}).pop("_jswr_cache_lock", None)
+    if cache_lock is not None:
+        os.close(cache_lock)
+
+
+# Warm drivers for reuse, keyed on _chrome_config() tuples. A driver is either
+# idle here or held by exactly one fetch.
+_IDLE_DRIVERS = {}   # config -> [(driver, released_at), ...]
+# Every driver _launch_driver() started and _quit_driver() has not quit yet,
+# idle or in use. Chrome runs in its own session, where Ctrl-C and SIGHUP from
+# the terminal don't reach it, so these are killed when the process exits.
+_LIVE_DRIVERS = set()
+_POOL_LOCK = threading.Lock()
+
+
+class _DaemonExecutor:
+    """
+    A minimal ThreadPoolExecutor with daemon worker threads. ThreadPoolExecutor
+    joins its workers at interpreter exit, so a fetch abandoned after its hard
+    timeout would keep the process alive until it finished on its own.
+    """
+
+    def __init__(self, max_workers, thread_name_prefix):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._queue = queue.SimpleQueue()
+        self._workers = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn):
+        future = concurrent.futures.Future()
+        self._queue.put((future, fn))
+        with self._lock:
+            if self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(target=self._work, daemon=True,
+                                 name=f"{self.thread_name_prefix}_{self._workers}").start()
+        return future
+
+    def _work(self):
+        while True:
+            future, fn = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue  # cancelled while queued
+            try:
+                future.set_result(fn())
+            except BaseException as exc:
+                future.set_exception(exc)
+
+
+# Runs the fetches for fetch_with_timeout(). Its size caps how many browsers
+# this process drives at once; further fetches queue for a free worker.
+_FETCH_EXECUTOR = _DaemonExecutor(
+    max_workers=int(os.environ.get("JSWR_MAX_CONCURRENCY", "4")),
+    thread_name_prefix="fetch-rendered",
+)
+
+
+def _driver_alive(driver):
+    try:
+        return driver.service.process.poll() is None and driver.execute_script("return 1") == 1
+    except Exception:
+        return False
+
+
+def _reset_driver(driver, config):
+    """Clear what a fetch left behind before its driver goes back to the pool."""
+    width, height, capture_console, capture_network, profile_dir = config[:5]
+    # A --profile browser keeps its session on purpose. Network.clearBrowserCookies
+    # covers every domain, unlike delete_all_cookies().
+    if not profile_dir:
+        # Storage.clearDataForOrigin ("all": local storage, IndexedDB, service
+        # workers, Cache Storage, ...) for the page's origin and every origin it
+        # loaded resources from, which includes its iframes. sessionStorage is
+        # per tab and not covered, so it is cleared from the page.
+        origins = driver.execute_script(
+            "try { sessionStorage.clear(); } catch (e) {}"
+            "var origins = [location.origin];"
+            "performance.getEntriesByType('resource').forEach(function (e) {"
+            "  try { origins.push(new URL(e.name).origin); } catch (err) {}"
+            "});"
+            "return origins;") or []
+        for origin in set(origins):
+            if origin.startswith(("http:", "https:")):
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin",
+                                       {"origin": origin, "storageTypes": "all"})
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    driver.get("about:blank")
+    # Drain log buffers so the next fetch only sees its own entries
     if capture_console:
-        logging_prefs["browser"] = "ALL"
+        driver.get_log("browser")
     if capture_network:
-        logging_prefs["performance"] = "ALL"
-    if logging_prefs:
-        chrome_options.set_capability("goog:loggingPrefs", logging_prefs)
+        driver.get_log("performance")
+
+
+def acquire_driver(config):
+    """
+    Get a driver for a _chrome_config() tuple: a live idle one from the pool
+    (release_driver() already reset it), or a freshly launched one. Hand it
+    back with release_driver() when done, or quit it if its state is suspect.
+
+    Launches are not rationed here: fetch_with_timeout() runs at most
+    JSWR_MAX_CONCURRENCY fetches at once, which bounds the browsers too.
+    """
+    while True:
+        with _POOL_LOCK:
+            idle = _IDLE_DRIVERS.get(config)
+            driver = idle.pop()[0] if idle else None
+        if driver is None:
+            return _launch_driver(config)
+
+        # Chrome may have crashed or been killed while the driver sat idle
+        if _driver_alive(driver):
+            return driver
+        _quit_driver(driver)
+
+
+def release_driver(config, driver):
+    """
+    Return a driver from acquire_driver() to the pool for reuse. It is reset
+    first, so an idle browser neither keeps running the last page (scripts,
+    timers, open connections) nor holds on to its cookies and storage; a
+    driver that fails to reset is quit instead.
+    """
+    try:
+        _reset_driver(driver, config)
+    except Exception:
+        _quit_driver(driver)
+        return
+    with _POOL_LOCK:
+        _IDLE_DRIVERS.setdefault(config, []).append((driver, time.monotonic()))
+
+
+def evict_idle_drivers(max_idle_seconds):
+    """Quit pooled drivers that have been idle for more than max_idle_seconds."""
+    cutoff = time.monotonic() - max_idle_seconds
+    expired = []
+    with _POOL_LOCK:
+        for idle in _IDLE_DRIVERS.values():
+            expired += [driver for driver, released_at in idle if released_at < cutoff]
+            idle[:] = [entry for entry in idle if entry[1] >= cutoff]
+    for driver in expired:
+        _quit_driver(driver)
+
+
+def _kill_live_drivers():
+    """SIGKILL every browser this process started that has not been quit."""
+    with _POOL_LOCK:
+        drivers = list(_LIVE_DRIVERS)
+    for driver in drivers:
+        try:
+            _kill_driver(driver)
+        except Exception:
+            pass
+
+
+def drain_driver_pool():
+    """Quit every idle pooled driver and kill those still in use (e.g. by a
+    fetch interrupted with Ctrl-C). Runs at interpreter exit."""
+    with _POOL_LOCK:
+        drivers = [driver for idle in _IDLE_DRIVERS.values() for driver, _ in idle]
+        _IDLE_DRIVERS.clear()
+    for driver in drivers:
+        _quit_driver(driver)
+    _kill_live_drivers()
+
+
+atexit.register(drain_driver_pool)
+
+
+def _exit_on_signal(signum, frame):
+    """SIGINT/SIGTERM/SIGHUP handler: kill the browsers in use right away, then
+    exit through atexit, which quits the idle ones."""
+    _kill_live_drivers()
+    sys.exit(128 + signum)
+
+
+class _NetworkIdle:
+    """
+    WebDriverWait condition for wait_strategy="networkidle": true once the
+    document has loaded and no new request has started for quiet_seconds.
+
+    With network_requests (a list, when network capture is on) requests are
+    seen through the performance log, and the polled entries are decoded into
+    network_requests as they arrive. Otherwise the page's resource timing
+    entry count is watched instead. Those entries appear when a request
+    finishes, so there "idle" means no request has completed for quiet_seconds:
+    a single long request still in flight (a slow API call, long polling) is
+    not noticed. The resource timing buffer is raised from its default of 250
+    entries so busy pages keep producing entries to count.
+    """
+
+    def __init__(self, network_requests=None, quiet_seconds=0.5):
+        self.network_requests = network_requests
+        self.quiet_seconds = quiet_seconds
+        self.last_activity = time.monotonic()
+        self.resource_count = -1
+
+    def __call__(self, driver):
+        if self.network_requests is not None:
+            seen = len(self.network_requests)
+            _collect_network_events(driver.get_log("performance"), self.network_requests)
+            active = any(r["type"] == "request" for r in self.network_requests[seen:])
+            ready = driver.execute_script("return document.readyState") == "complete"
+        else:
+            count, state = driver.execute_script(
+                "performance.setResourceTimingBufferSize(100000);"
+                "return [performance.getEntriesByType('resource').length, document.readyState]")
+            active = count != self.resource_count
+            self.resource_count = count
+            ready = state == "complete"
+
+        now = time.monotonic()
+        if active:
+            self.last_activity = now
+            return False
+        return ready and now - self.last_activity >= self.quiet_seconds
+
+
+def _wait_for_render(driver, wait_seconds, wait_for=None, wait_strategy="ready", log=_stderr,
+                     network_requests=None):
+    """Wait for the page to finish rendering — wait_seconds is an upper bound.
+
+    wait_strategy:
+      "ready"        return as soon as document.readyState is "complete"
+      "networkidle"  also wait until no new request has started for 0.5s
+                     (see _NetworkIdle, which decodes the polled log into network_requests)
+      "fixed"        always sleep the full wait_seconds (the old behaviour)
+    wait_for, a CSS selector, overrides "ready"/"networkidle": return as soon
+    as a matching element is present.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+
+    if wait_seconds <= 0:
+        return
+    if wait_strategy == "fixed":
+        time.sleep(wait_seconds)
+        return
+
+    if wait_for:
+        condition = EC.presence_of_element_located((By.CSS_SELECTOR, wait_for))
+    elif wait_strategy == "networkidle":
+        condition = _NetworkIdle(network_requests)
+    else:
+        condition = lambda d: d.execute_script("return document.readyState") == "complete"
+
+    try:
+        WebDriverWait(driver, wait_seconds, poll_frequency=0.1).until(condition)
+    except TimeoutException:
+        # Budget exhausted — carry on with whatever has rendered so far,
+        # exactly as the fixed sleep used to.
+        log(f"[wait] page not ready after {wait_seconds}s, continuing")
+
+
+def _wait_for_navigation(driver, url_before, wait_seconds, wait_strategy="ready", log=_stderr,
+                         network_requests=None):
+    """Wait up to wait_seconds for a click/post-js triggered navigation to finish.
+
+    Returns once current_url differs from url_before and the new document is
+    ready by wait_strategy's measure. If the URL never changes (e.g. an
+    in-page XHR login), the full budget is spent, matching the old fixed sleep.
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    if wait_seconds <= 0:
+        return
+    if wait_strategy == "fixed":
+        time.sleep(wait_seconds)
+        return
+
+    deadline = time.monotonic() + wait_seconds
+    try:
+        WebDriverWait(driver, wait_seconds, poll_frequency=0.1).until(
+            lambda d: d.current_url != url_before
+        )
+    except TimeoutException:
+        return
+    _wait_for_render(driver, max(0, deadline - time.monotonic()), wait_strategy=wait_strategy,
+                     log=log, network_requests=network_requests)
+
+
+@functools.lru_cache(maxsize=32)
+def _read_js(path, mtime_ns):
+    with open(path, "rb") as f:
+        # Map big bundles instead of copying them through a read buffer
+        if os.fstat(f.fileno()).st_size > 64 * 1024:
+            with mmap.mmap(f.fileno(), 0, prot=mmap.PROT_READ) as m:
+                return str(m, "utf-8")
+        return f.read().decode("utf-8")
 
-    return chrome_options
+
+def _load_js(path):
+    """Contents of an --exec-js-file / --post-js-file script.
+
+    Cached per (path, mtime), so a long-lived process such as the daemon only
+    re-reads a file after it has been modified.
+    """
+    return _read_js(path, os.stat(path).st_mtime_ns)
+
+
+def _handle_request_event(params, append):
+    req = params.get("request", {})
+    append({
+        "type": "request",
+        "url": req.get("url", ""),
+        "method": req.get("method", ""),
+        "resource_type": params.get("type", ""),
+    })
+
+
+def _location_header(headers):
+    # Header name case depends on the protocol (HTTP/2 is lower-case)
+    return next((v for k, v in headers.items() if k.lower() == "location"), "")
+
+
+def _handle_response_event(params, append):
+    resp = params.get("response", {})
+    headers = resp.get("headers", {})
+    append({
+        "type": "response",
+        "url": resp.get("url", ""),
+        "status": resp.get("status", 0),
+        "mime": resp.get("mimeType", ""),
+        "headers": headers,
+        # Resolved once here rather than searched for when formatting
+        "location": _location_header(headers),
+    })
+
+
+# Performance log method -> handler(params, append) adding one network_requests entry
+NETWORK_EVENT_HANDLERS = {
+    "Network.requestWillBeSent": _handle_request_event,
+    "Network.responseReceived": _handle_response_event,
+}
+
+
+def _collect_network_events(entries, out):
+    """Decode performance log entries and append the network events among them to out."""
+    loads = _json.loads
+    handlers = NETWORK_EVENT_HANDLERS
+    append = out.append
+    for entry in entries:
+        raw = entry["message"]
+        # Cheap substring test before decoding: most performance entries
+        # are Page/Runtime/other Network events we would only throw away.
+        if '"Network.requestWillBeSent"' not in raw and '"Network.responseReceived"' not in raw:
+            continue
+        try:
+            msg = loads(raw)["message"]
+            handler = handlers.get(msg["method"])
+            if handler:
+                handler(msg.get("params") or {}, append)
+        except (ValueError, KeyError):  # both JSONDecodeErrors are ValueErrors
+            continue
 
 
 def _fetch_rendered_inner(url, wait_seconds=5, capture_console=False, screenshot_path=None,
                           width=1280, height=900, exec_js=None, post_js=None,
                           capture_network=False, type_actions=None, click_actions=None,
                           post_wait_seconds=0, profile_dir=None,
-                          _driver=None, _page_load_timeout=30, _script_timeout=15):
+                          wait_for=None, force_wait=False, wait_strategy="ready",
+                          fast=False, no_images=False,
+                          no_cache=False, native_typing=False,
+                          output_mode=None, page_load_strategy="eager",
+                          _driver=None, _page_load_timeout=30, _script_timeout=15, _log=None):
     """
     Core fetch logic — private. Do not call directly; use fetch_rendered() instead,
     which always enforces a hard wall-clock timeout via fetch_with_timeout().
 
+    wait_strategy is "ready", "networkidle" or "fixed"
+    (see _wait_for_render()); force_wait=True is the same as "fixed".
+    type_actions are typed in one JavaScript call unless native_typing=True,
+    which types with send_keys() (real key events) instead. click_actions
+    always go through WebDriver, once the element is clickable.
+    page_load_strategy ("normal", "eager" or "none") is when driver.get()
+    returns: after the load event, at DOMContentLoaded, or right away.
+    output_mode ("html", "console", "network" or "screenshot") says what the
+    caller will print; results it would discard are not collected (html comes
+    back as None, logs as empty lists).
+
     Accepts an optional pre-created _driver so that fetch_with_timeout() can hold
-    the driver reference for emergency SIGKILL on timeout.
+    the driver reference for emergency SIGKILL on timeout. It must have been
+    launched for the same width and height (the window is not resized).
     _page_load_timeout and _script_timeout are applied to the driver here;
     the hard wall-clock deadline is enforced externally by fetch_with_timeout().
+
+    Progress lines ([type], [current url], ...) go to _log(line) if given;
+    otherwise they are buffered and written to stderr in one go at the end.
     """
-    chrome_options = _build_chrome_options(width, height, capture_console, capture_network, profile_dir)
-    service = Service("/snap/bin/chromium.chromedriver")
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.timeouts import Timeouts
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import ElementClickInterceptedException
+
+    log_lines = []
+    log = _log if _log is not None else log_lines.append
+
+    capture_console = capture_console and _keeps(output_mode, "console")
+    capture_network = capture_network and _keeps(output_mode, "network")
+
+    if force_wait:
+        wait_strategy = "fixed"
+    # Filled while waiting for network idle (which polls the performance log)
+    # and from the rest of the log at the end
+    network_requests = [] if capture_network else None
 
     driver = _driver
     driver_owned = driver is None  # only quit if we created it ourselves
 
     try:
         if driver is None:
-            driver = webdriver.Chrome(service=service, options=chrome_options)
+            driver = _launch_driver(_chrome_config(dict(
+                width=width, height=height, capture_console=capture_console,
+                capture_network=capture_network, profile_dir=profile_dir, fast=fast,
+                screenshot_path=screenshot_path, no_images=no_images, no_cache=no_cache,
+                page_load_strategy=page_load_strategy, output_mode=output_mode)))
 
-        driver.set_window_size(width, height)
-
-        # Guard the initial page load — most common hang point
-        driver.set_page_load_timeout(_page_load_timeout)
-        # Guard individual execute_script() calls (e.g. exec_js with infinite loops)
-        driver.set_script_timeout(_script_timeout)
+        # Guard the initial page load (the most common hang point) and individual
+        # execute_script() calls (e.g. exec_js with infinite loops) — both in one
+        # command. No set_window_size(): Chrome was launched with --window-size
+        # for this width and height, and nothing resizes the window.
+        driver.timeouts = Timeouts(page_load=_page_load_timeout, script=_script_timeout)
 
         # Load the page
         driver.get(url)
@@ -105,53 +792,97 @@ def _fetch_rendered_inner(url, wait_seconds=5, capture_console=False, screenshot
         if exec_js:
             js_result = driver.execute_script(exec_js)
             if js_result is not None:
-                print(f"[exec-js result] {js_result}", file=sys.stderr)
+                log(f"[exec-js result] {js_result}")
 
-        # Wait for JavaScript to render
-        time.sleep(wait_seconds)
+        # Wait for JavaScript to render (returns early once the page is ready)
+        _wait_for_render(driver, wait_seconds, wait_for, wait_strategy, log, network_requests)
 
-        # Perform type actions using Selenium's send_keys (more reliable for React)
-        if type_actions:
-            for selector, value in type_actions:
-                try:
-                    element = WebDriverWait(driver, 10).until(
+        # Remember where we are so the post-wait can detect a navigation
+        url_before = driver.current_url if (click_actions or post_js) else None
+
+        # One wait object for all element lookups below
+        element_wait = WebDriverWait(driver, 10)
+
+        type_actions = type_actions or []
+        click_actions = click_actions or []
+
+        # Fill the fields in one execute_script round-trip; whatever is not
+        # ready for that falls through to the per-element path below
+        typed = 0
+        if not native_typing and type_actions:
+            typed = driver.execute_script(BATCH_TYPE_JS, type_actions)
+            for selector, value in type_actions[:typed]:
+                log(f"[type] {selector} = {value[:20]}{'...' if len(value) > 20 else ''}")
+
+        # Type the rest as native text input. --native-typing sends real key
+        # events with send_keys(); otherwise CDP Input.insertText types the whole
+        # value in one round-trip (no keydown/keyup) instead of one per character.
+        for selector, value in type_actions[typed:]:
+            try:
+                if native_typing:
+                    element = element_wait.until(
                         EC.presence_of_element_located((By.CSS_SELECTOR, selector))
                     )
                     element.clear()
                     element.send_keys(value)
-                    print(f"[type] {selector} = {value[:20]}{'...' if len(value) > 20 else ''}", file=sys.stderr)
-                except Exception as e:
-                    print(f"[type error] {selector}: {e}", file=sys.stderr)
+                else:
+                    # Visible and enabled: insertText types into whatever has
+                    # focus, and would silently do nothing for a disabled field
+                    element = element_wait.until(
+                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
+                    )
+                    driver.execute_script(
+                        "var e = arguments[0]; e.focus();"
+                        "if ('value' in e) { e.value = ''; } else { e.textContent = ''; }", element)
+                    driver.execute_cdp_cmd("Input.insertText", {"text": value})
+                    driver.execute_script(
+                        "arguments[0].dispatchEvent(new Event('input', {bubbles: true}));", element)
+                log(f"[type] {selector} = {value[:20]}{'...' if len(value) > 20 else ''}")
+            except Exception as e:
+                log(f"[type error] {selector}: {e}")
 
         # Perform click actions
-        if click_actions:
-            for selector in click_actions:
+        for selector in click_actions:
+            try:
+                element = element_wait.until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
+                )
                 try:
-                    element = WebDriverWait(driver, 10).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                    )
                     element.click()
-                    print(f"[click] {selector}", file=sys.stderr)
-                except Exception as e:
-                    print(f"[click error] {selector}: {e}", file=sys.stderr)
+                    log(f"[click] {selector}")
+                except ElementClickInterceptedException:
+                    # Something (cookie banner, overlay) covers the element's
+                    # centre. A pointer click would land on the overlay too, so
+                    # dispatch the click on the element itself from JavaScript.
+                    driver.execute_script("arguments[0].click();", element)
+                    log(f"[click] {selector} (covered; clicked from JavaScript)")
+            except Exception as e:
+                log(f"[click error] {selector}: {e}")
 
         # Execute post-wait JavaScript if provided
         post_js_result = None
         if post_js:
             post_js_result = driver.execute_script(post_js)
             if post_js_result is not None:
-                print(f"[post-js result] {post_js_result}", file=sys.stderr)
+                log(f"[post-js result] {post_js_result}")
 
         # Wait after post-js for navigation/loading to complete
         if post_wait_seconds > 0:
-            time.sleep(post_wait_seconds)
-
-        # Get the rendered HTML
-        html = driver.page_source
+            if url_before is not None:
+                _wait_for_navigation(driver, url_before, post_wait_seconds, wait_strategy, log,
+                                     network_requests)
+            else:
+                time.sleep(post_wait_seconds)
 
-        # Get current URL (useful after redirects)
-        current_url = driver.current_url
-        print(f"[current url] {current_url}", file=sys.stderr)
+        # Get the rendered HTML, and the current URL (useful after redirects) in
+        # the same round-trip. The serialisation is the one chromedriver runs
+        # for page_source, so the output (doctype included) is unchanged.
+        if _keeps(output_mode, "html"):
+            html, current_url = driver.execute_script(
+                "return [new XMLSerializer().serializeToString(document), location.href];")
+        else:
+            html, current_url = None, driver.current_url
+        log(f"[current url] {current_url}")
 
         # Get console logs if requested
         console_logs = []
@@ -159,150 +890,188 @@ def _fetch_rendered_inner(url, wait_seconds=5, capture_console=False, screenshot
             console_logs = driver.get_log("browser")
 
         # Get network logs if requested
-        network_requests = []
         if capture_network:
-            perf_logs = driver.get_log("performance")
-            for entry in perf_logs:
-                try:
-                    msg = json.loads(entry["message"])["message"]
-                    method = msg.get("method", "")
-                    params = msg.get("params", {})
-                    if method == "Network.requestWillBeSent":
-                        req = params.get("request", {})
-                        network_requests.append({
-                            "type": "request",
-                            "url": req.get("url", ""),
-                            "method": req.get("method", ""),
-                            "resource_type": params.get("type", ""),
-                        })
-                    elif method == "Network.responseReceived":
-                        resp = params.get("response", {})
-                        network_requests.append({
-                            "type": "response",
-                            "url": resp.get("url", ""),
-                            "status": resp.get("status", 0),
-                            "mime": resp.get("mimeType", ""),
-                            "headers": resp.get("headers", {}),
-                        })
-                except (json.JSONDecodeError, KeyError):
-                    continue
+            _collect_network_events(driver.get_log("performance"), network_requests)
+        else:
+            network_requests = []
 
         # Take screenshot if requested
         if screenshot_path:
-            # Get full page height
-            total_height = driver.execute_script("return document.body.scrollHeight")
-            driver.set_window_size(width, total_height)
-            time.sleep(0.5)  # Brief wait for resize
-            driver.save_screenshot(screenshot_path)
+            import base64
+
+            # Capture the full page in one go: captureBeyondViewport renders
+            # content outside the viewport, so there's no window resize (and
+            # no relayout + settle sleep) before the shot. The clip keeps the
+            # viewport width, like the old resize-to-full-height shots did, so
+            # horizontally overflowing pages don't produce wider images.
+            content = driver.execute_cdp_cmd("Page.getLayoutMetrics", {})
+            content = content.get("cssContentSize") or content["contentSize"]
+            result = driver.execute_cdp_cmd("Page.captureScreenshot", {
+                "format": "png",
+                "captureBeyondViewport": True,
+                "fromSurface": True,
+                "clip": {"x": 0, "y": 0, "width": width,
+                         "height": content["height"], "scale": 1},
+            })
+            _write_file(screenshot_path, base64.b64decode(result["data"]))
 
         return html, console_logs, network_requests
 
     finally:
+        _flush_log(log_lines)
         if driver and driver_owned:
-            try:
-                driver.quit()
-            except Exception:
-                pass
+            _quit_driver(driver)
+
+
+_MEMINFO_CACHE = {"at": float("-inf"), "mb": 0}
+
+
+def _mem_available_mb():
+    """MemAvailable from /proc/meminfo in MB, re-read at most once a second."""
+    now = time.monotonic()
+    if now - _MEMINFO_CACHE["at"] >= 1.0:
+        with open("/proc/meminfo", "rb") as f:
+            data = f.read()
+        # MemAvailable (since kernel 3.14) is the most accurate measure of how much
+        # RAM is actually available for a new process — it accounts for reclaimable
+        # cache and buffers, unlike MemFree alone.
+        start = data.find(b"MemAvailable:")
+        if start < 0:
+            start = data.find(b"MemFree:")
+        end = data.find(b"\n", start)
+        _MEMINFO_CACHE["mb"] = int(data[start:end].split()[1]) / 1024  # values are in kB
+        _MEMINFO_CACHE["at"] = now
+    return _MEMINFO_CACHE["mb"]
 
 
-def fetch_with_timeout(url, total_timeout=60, **kwargs):
+def fetch_with_timeout(url, total_timeout=60, _log=None, **kwargs):
     """
     Runs _fetch_rendered_inner() under a hard wall-clock timeout.
 
     Layers of timeout protection:
-      - total_timeout (this function)  — hard wall-clock deadline via threading
+      - total_timeout (this function)  — hard wall-clock deadline via a worker thread;
+                                         includes waiting for a free worker and
+                                         launching the browser
       - _page_load_timeout             — guards driver.get() blocking (default: 60% of total)
       - _script_timeout                — guards each execute_script() call (default: 15s)
 
-    If total_timeout is exceeded, the chromedriver process is SIGKILLed directly,
-    which unblocks any Selenium call that is stuck in IPC with Chrome.
+    If total_timeout is exceeded, chromedriver's process group (chromedriver,
+    Chrome and its renderers) is SIGKILLed directly, which unblocks any
+    Selenium call that is stuck in IPC with Chrome.
+
+    Progress lines go to stderr, or to _log(line) if given (the daemon uses
+    this to send them back to its client).
+
+    exec_js_file / post_js_file are read here, before a browser is acquired,
+    and passed on as exec_js / post_js; giving both a script and its file is
+    a ValueError.
 
     Raises TimeoutError if the deadline is exceeded, or re-raises any exception
     from fetch_rendered() otherwise.
     """
+    def report(lines):
+        if _log is None:
+            _flush_log(lines)
+        else:
+            for line in lines:
+                _log(line)
+
     # Warn if free memory looks too low to safely launch a Chrome instance.
     # Chrome typically needs 300-500MB; we warn at 512MB as a conservative threshold.
     # This is advisory only — the call proceeds regardless. For hard rejection,
     # put an is_mem_enough() guard in your REST API wrapper instead.
     _CHROME_MEM_WARN_MB = 512
     try:
-        # MemAvailable (since kernel 3.14) is the most accurate measure of how much
-        # RAM is actually available for a new process — it accounts for reclaimable
-        # cache and buffers, unlike MemFree alone.
-        meminfo = {}
-        with open("/proc/meminfo") as f:
-            for line in f:
-                key, val = line.split(":", 1)
-                meminfo[key.strip()] = int(val.split()[0])  # values are in kB
-        mem_available_mb = meminfo.get("MemAvailable", meminfo.get("MemFree", 0)) / 1024
+        mem_available_mb = _mem_available_mb()
         if mem_available_mb < _CHROME_MEM_WARN_MB:
-            print(
+            report([
                 f"[warn] only {mem_available_mb:.0f}MB of RAM available "
-                f"(threshold: {_CHROME_MEM_WARN_MB}MB) — Chrome may fail or cause OOM",
-                file=sys.stderr,
-            )
+                f"(threshold: {_CHROME_MEM_WARN_MB}MB) — Chrome may fail or cause OOM"
+            ])
     except Exception:
         pass  # never let a monitoring check break the actual fetch
 
+    # Read script files first: a mistyped path should not cost a Chrome launch
+    for key in ("exec_js", "post_js"):
+        path = kwargs.pop(f"{key}_file", None)
+        if path:
+            if kwargs.get(key):
+                raise ValueError(f"{key} and {key}_file are mutually exclusive")
+            kwargs[key] = _load_js(path)
+
     # Derive sub-timeouts from the total budget if not explicitly provided
     page_load_timeout = kwargs.pop("_page_load_timeout", int(total_timeout * 0.6))
     script_timeout    = kwargs.pop("_script_timeout",    min(15, int(total_timeout * 0.25)))
 
-    # Build the driver up front so we hold the reference for emergency kill.
-    # fetch_rendered() will skip creating its own driver when _driver is passed.
-    width          = kwargs.get("width", 1280)
-    height         = kwargs.get("height", 900)
-    capture_console = kwargs.get("capture_console", False)
-    capture_network = kwargs.get("capture_network", False)
-    profile_dir    = kwargs.get("profile_dir", None)
+    # The driver is held in state so the timeout path below can kill it.
+    # Without a caller-supplied _driver, the worker takes a warm one from the
+    # driver pool (or launches one) and it goes back to the pool after a
+    # successful fetch. Acquiring it on the worker means no browser is started
+    # for a fetch still queued for one of the JSWR_MAX_CONCURRENCY workers.
+    state = {"driver": kwargs.pop("_driver", None)}
+    config = _chrome_config(kwargs) if state["driver"] is None else None
+    # Progress lines from the fetch are collected here and written once the
+    # fetch is done — or has been given up on, so a hang still shows how far
+    # the fetch got.
+    log_lines = []
+    # Set when the deadline passes; a worker that only then gets its browser
+    # gives up instead of running the whole fetch for nobody
+    abandoned = threading.Event()
 
-    chrome_options = _build_chrome_options(width, height, capture_console, capture_network, profile_dir)
-    service = Service("/snap/bin/chromium.chromedriver")
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    def _run():
+        if state["driver"] is None:
+            state["driver"] = acquire_driver(config)
+            if abandoned.is_set():
+                _quit_driver(state["driver"])
+                return None
+        return _fetch_rendered_inner(
+            url,
+            _driver=state["driver"],
+            _page_load_timeout=page_load_timeout,
+            _script_timeout=script_timeout,
+            _log=log_lines.append,
+            **kwargs,
+        )
 
-    result_holder = {"result": None, "error": None}
+    future = _FETCH_EXECUTOR.submit(_run)
+    done, _ = concurrent.futures.wait((future,), timeout=total_timeout)
 
-    def _run():
-        try:
-            result_holder["result"] = _fetch_rendered_inner(
-                url,
-                _driver=driver,
-                _page_load_timeout=page_load_timeout,
-                _script_timeout=script_timeout,
-                **kwargs,
-            )
-        except Exception as exc:
-            result_holder["error"] = exc
-
-    thread = threading.Thread(target=_run, daemon=True)
-    thread.start()
-    thread.join(timeout=total_timeout)
-
-    if thread.is_alive():
-        # The thread is still blocked — force-kill Chrome at the OS level.
-        # driver.service.process is the chromedriver subprocess; killing it
-        # causes Chrome to exit too, which unblocks any pending IPC in the thread.
-        print(f"[timeout] Hard timeout of {total_timeout}s exceeded for {url}, killing Chrome",
-              file=sys.stderr)
-        try:
-            driver.service.process.kill()
-        except Exception:
-            pass
-        # Also attempt a graceful quit in case the process is somehow still alive;
-        # this is best-effort and may itself raise.
-        try:
-            driver.quit()
-        except Exception:
-            pass
+    if not done:
+        abandoned.set()
+        report(log_lines[:] + [
+            f"[timeout] Hard timeout of {total_timeout}s exceeded for {url}, killing Chrome"])
+        if not future.cancel():
+            # The worker is still blocked — force-kill Chrome at the OS level.
+            # Killing chromedriver's process group takes Chrome and its
+            # renderers with it (killing chromedriver alone can leave them
+            # running) and unblocks any pending IPC in the worker. A driver
+            # still being launched is quit as soon as the worker gets it.
+            driver = state["driver"]
+            if driver is not None:
+                try:
+                    _kill_driver(driver)
+                except Exception:
+                    pass
+            future.add_done_callback(lambda f: _quit_driver(state["driver"]))
         raise TimeoutError(
             f"fetch_rendered() exceeded {total_timeout}s wall-clock timeout for {url}"
         )
 
-    # Normal completion — driver was already quit inside fetch_rendered's finally block.
-    if result_holder["error"]:
-        raise result_holder["error"]
+    report(log_lines)
+
+    # Normal completion — _fetch_rendered_inner() does not quit a driver it was
+    # handed. A pooled driver goes back for reuse unless the fetch failed and
+    # left it in an unknown state.
+    error = future.exception()
+    if config is not None and state["driver"] is not None:
+        if error:
+            _quit_driver(state["driver"])
+        else:
+            release_driver(config, state["driver"])
 
-    return result_holder["result"]
+    if error:
+        raise error
+    return future.result()
 
 
 def fetch_rendered(url, total_timeout=60, **kwargs):
@@ -312,13 +1081,19 @@ def fetch_rendered(url, total_timeout=60, **kwargs):
     deadline is exceeded. The timeout covers driver startup, page load,
     JS execution, waits, and teardown combined.
 
+    Browsers are pooled per launch configuration, so repeated calls in one
+    process reuse a warm Chrome instead of starting a new one each time.
+
     Args:
         url:           URL to fetch.
         total_timeout: Hard wall-clock deadline in seconds (default: 60).
-        **kwargs:      All other arguments accepted by _fetch_rendered_inner()
+        **kwargs:      exec_js_file / post_js_file (see fetch_with_timeout()) and
+                       all other arguments accepted by _fetch_rendered_inner()
                        (wait_seconds, capture_console, screenshot_path, width,
                         height, exec_js, post_js, capture_network, type_actions,
-                        click_actions, post_wait_seconds, profile_dir).
+                        click_actions, post_wait_seconds, profile_dir,
+                        wait_for, force_wait, wait_strategy, fast, no_images, no_cache, native_typing,
+                        output_mode, page_load_strategy).
 
     Returns:
         (html, console_logs, network_requests)
@@ -329,117 +1104,166 @@ def fetch_rendered(url, total_timeout=60, **kwargs):
     return fetch_with_timeout(url, total_timeout=total_timeout, **kwargs)
 
 
-def format_console_logs(logs):
-    """Format console logs for readable output."""
-    output = []
+def _fetch_via_daemon(url, total_timeout=60, socket_path=DAEMON_SOCKET, **kwargs):
+    """
+    Send a fetch to a running js-web-renderer-daemon instead of launching Chrome.
+
+    The kwargs are the same as fetch_rendered()'s and are sent as one JSON line;
+    the daemon answers with one JSON line holding html, console_logs and
+    network_requests (or error/timeout on failure), plus the fetch's progress
+    lines in log, which are written to stderr here as if the fetch ran locally.
+
+    Raises OSError if the daemon cannot be reached, TimeoutError if it reports
+    a hard timeout, and RuntimeError for any other daemon-side error.
+    """
+    import socket
+
+    request = dict(kwargs, url=url, total_timeout=total_timeout)
+    # The daemon has its own working directory
+    for key in ("profile_dir", "screenshot_path", "exec_js_file", "post_js_file"):
+        if request.get(key):
+            request[key] = os.path.abspath(request[key])
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        # The daemon enforces total_timeout itself; the slack covers a cold Chrome launch.
+        sock.settimeout(total_timeout + 30)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+
+    if not line:
+        raise RuntimeError("daemon closed the connection without a response")
+    response = json.loads(line)
+    _flush_log(response.get("log"))
+    if "error" in response:
+        if response.get("timeout"):
+            raise TimeoutError(response["error"])
+        raise RuntimeError(response["error"])
+
+    return response["html"], response["console_logs"], response["network_requests"]
+
+
+def format_console_logs(logs, out=None):
+    """Format console logs for readable output.
+
+    Appends one newline-terminated line per entry to the list out, so callers
+    can collect all output and write it once. Without out, returns the text.
+    """
+    if out is None:
+        out = []
+        format_console_logs(logs, out)
+        return "".join(out)[:-1]
+
+    append = out.append
     for entry in logs:
-        level = entry.get("level", "INFO")
-        message = entry.get("message", "")
-        output.append(f"[{level}] {message}")
-    return "\n".join(output)
-
-def format_network_requests(requests):
-    """Format network requests for readable output."""
-    output = []
+        append(f"[{entry.get('level', 'INFO')}] {entry.get('message', '')}\n")
+
+
+def _format_request(entry, append):
+    append(f"[{entry['method']}] {entry['url']}  ({entry['resource_type']})\n")
+
+
+def _format_response(entry, append):
+    # Entries built elsewhere (older fetch_rendered() callers) may lack "location"
+    location = entry.get("location")
+    if location is None:
+        location = _location_header(entry.get("headers") or {})
+    append(f"  -> {entry['status']} {entry['mime']}  {entry['url']}\n")
+    if location:
+        append(f"     Location: {location}\n")
+
+
+# network_requests entry type -> formatter appending its line(s)
+NETWORK_FORMATTERS = {
+    "request": _format_request,
+    "response": _format_response,
+}
+
+
+def format_network_requests(requests, out=None):
+    """Format network requests for readable output.
+
+    Like format_console_logs(): appends newline-terminated lines to out, or
+    returns the text when out is not given.
+    """
+    if out is None:
+        out = []
+        format_network_requests(requests, out)
+        return "".join(out)[:-1]
+
+    append = out.append
+    formatter_for = NETWORK_FORMATTERS.get
     for entry in requests:
-        if entry["type"] == "request":
-            output.append(f"[{entry['method']}] {entry['url']}  ({entry['resource_type']})")
-        elif entry["type"] == "response":
-            location = entry.get("headers", {}).get("location", entry.get("headers", {}).get("Location", ""))
-            line = f"  -> {entry['status']} {entry['mime']}  {entry['url']}"
-            if location:
-                line += f"\n     Location: {location}"
-            output.append(line)
-    return "\n".join(output)
+        formatter = formatter_for(entry["type"])
+        if formatter:
+            formatter(entry, append)
+
+def _type_action(spec):
+    """argparse type for --type SEL::VALUE (:: because = occurs in CSS selectors)."""
+    import argparse
+
+    if "::" not in spec:
+        raise argparse.ArgumentTypeError("requires format 'selector::value'")
+    selector, value = spec.split("::", 1)
+    return selector, value
+
 
 if __name__ == "__main__":
     if len(sys.argv) < 2 or sys.argv[1] in ["-h", "--help"]:
         print(__doc__, file=sys.stderr)
         sys.exit(1 if len(sys.argv) < 2 else 0)
 
-    url = None
-    show_console = False
-    only_console = False
-    screenshot_path = None
-    only_screenshot = False
-    wait_seconds = 5
-    width = 1280
-    height = 900
-    exec_js = None
-    post_js = None
-    capture_network = False
-    only_network = False
-    type_actions = []
-    click_actions = []
-    post_wait_seconds = 0
-    profile_dir = None
-    total_timeout = 60
-
-    # Parse arguments
-    i = 1
-    while i < len(sys.argv):
-        arg = sys.argv[i]
-        if arg in ["--console", "-c"]:
-            show_console = True
-        elif arg == "--only-console":
-            show_console = True
-            only_console = True
-        elif arg == "--screenshot" and i + 1 < len(sys.argv):
-            i += 1
-            screenshot_path = sys.argv[i]
-        elif arg == "--only-screenshot":
-            only_screenshot = True
-        elif arg == "--wait" and i + 1 < len(sys.argv):
-            i += 1
-            wait_seconds = int(sys.argv[i])
-        elif arg == "--width" and i + 1 < len(sys.argv):
-            i += 1
-            width = int(sys.argv[i])
-        elif arg == "--height" and i + 1 < len(sys.argv):
-            i += 1
-            height = int(sys.argv[i])
-        elif arg == "--exec-js" and i + 1 < len(sys.argv):
-            i += 1
-            exec_js = sys.argv[i]
-        elif arg == "--exec-js-file" and i + 1 < len(sys.argv):
-            i += 1
-            with open(sys.argv[i], "r") as f:
-                exec_js = f.read()
-        elif arg == "--post-js" and i + 1 < len(sys.argv):
-            i += 1
-            post_js = sys.argv[i]
-        elif arg == "--post-js-file" and i + 1 < len(sys.argv):
-            i += 1
-            with open(sys.argv[i], "r") as f:
-                post_js = f.read()
-        elif arg == "--post-wait" and i + 1 < len(sys.argv):
-            i += 1
-            post_wait_seconds = int(sys.argv[i])
-        elif arg == "--network-log":
-            capture_network = True
-        elif arg == "--only-network":
-            capture_network = True
-            only_network = True
-        elif arg == "--type" and i + 1 < len(sys.argv):
-            i += 1
-            # Format: selector::value (using :: to avoid conflicts with = in CSS selectors)
-            if "::" in sys.argv[i]:
-                selector, value = sys.argv[i].split("::", 1)
-                type_actions.append((selector, value))
-            else:
-                print(f"Error: --type requires format 'selector::value'", file=sys.stderr)
-        elif arg == "--click" and i + 1 < len(sys.argv):
-            i += 1
-            click_actions.append(sys.argv[i])
-        elif arg == "--profile" and i + 1 < len(sys.argv):
-            i += 1
-            profile_dir = sys.argv[i]
-        elif arg == "--timeout" and i + 1 < len(sys.argv):
-            i += 1
-            total_timeout = int(sys.argv[i])
-        elif not arg.startswith("-"):
-            url = arg
-        i += 1
+    import argparse
+
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(signum, _exit_on_signal)
+
+    # Parse arguments. Help text is the module docstring (printed above), so
+    # argparse's own -h is off; unknown options are warned about and ignored.
+    parser = argparse.ArgumentParser(prog="js-web-renderer", usage="%(prog)s <URL> [options] (see --help)",
+                                     add_help=False, allow_abbrev=False)
+    parser.add_argument("url", nargs="?")
+    parser.add_argument("--console", "-c", dest="show_console", action="store_true")
+    parser.add_argument("--only-console", action="store_true")
+    parser.add_argument("--screenshot", dest="screenshot_path")
+    parser.add_argument("--only-screenshot", action="store_true")
+    parser.add_argument("--wait", dest="wait_seconds", type=int, default=5)
+    parser.add_argument("--wait-for")
+    parser.add_argument("--force-wait", action="store_true")
+    parser.add_argument("--wait-strategy", choices=("ready", "networkidle", "fixed"), default="ready")
+    parser.add_argument("--page-load-strategy", choices=("normal", "eager", "none"), default="eager")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=900)
+    exec_js_group = parser.add_mutually_exclusive_group()
+    exec_js_group.add_argument("--exec-js")
+    exec_js_group.add_argument("--exec-js-file")
+    post_js_group = parser.add_mutually_exclusive_group()
+    post_js_group.add_argument("--post-js")
+    post_js_group.add_argument("--post-js-file")
+    parser.add_argument("--post-wait", dest="post_wait_seconds", type=int, default=0)
+    parser.add_argument("--network-log", dest="capture_network", action="store_true")
+    parser.add_argument("--only-network", action="store_true")
+    parser.add_argument("--type", dest="type_actions", type=_type_action, action="append", default=[])
+    parser.add_argument("--native-typing", action="store_true")
+    parser.add_argument("--click", dest="click_actions", action="append", default=[])
+    parser.add_argument("--profile", dest="profile_dir")
+    parser.add_argument("--timeout", dest="total_timeout", type=int, default=60)
+    parser.add_argument("--no-images", action="store_true")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--fast", action="store_true")
+    parser.add_argument("--daemon", dest="use_daemon", action="store_true")
+    args, unknown = parser.parse_known_args()
+    if unknown:
+        print(f"[warn] ignoring unknown arguments: {' '.join(unknown)}", file=sys.stderr)
+
+    url = args.url
+    show_console = args.show_console or args.only_console
+    only_console = args.only_console
+    screenshot_path = args.screenshot_path
+    only_screenshot = args.only_screenshot
+    capture_network = args.capture_network or args.only_network
+    only_network = args.only_network
 
     if not url:
         print("Error: URL required", file=sys.stderr)
@@ -449,52 +1273,86 @@ if __name__ == "__main__":
     if only_screenshot and not screenshot_path:
         screenshot_path = "/tmp/screenshot.png"
 
+    if only_screenshot:
+        output_mode = "screenshot"
+    elif only_network:
+        output_mode = "network"
+    elif only_console:
+        output_mode = "console"
+    else:
+        output_mode = "html"
+
+    fetch_kwargs = dict(
+        wait_seconds=args.wait_seconds,
+        capture_console=show_console,
+        screenshot_path=screenshot_path,
+        width=args.width,
+        height=args.height,
+        exec_js=args.exec_js,
+        post_js=args.post_js,
+        exec_js_file=args.exec_js_file,
+        post_js_file=args.post_js_file,
+        capture_network=capture_network,
+        type_actions=args.type_actions or None,
+        click_actions=args.click_actions if args.click_actions else None,
+        post_wait_seconds=args.post_wait_seconds,
+        profile_dir=args.profile_dir,
+        wait_for=args.wait_for,
+        wait_strategy="fixed" if args.force_wait else args.wait_strategy,
+        fast=args.fast,
+        no_images=args.no_images,
+        no_cache=args.no_cache,
+        page_load_strategy=args.page_load_strategy,
+        native_typing=args.native_typing,
+        output_mode=output_mode,
+    )
+
     try:
-        html, console_logs, network_requests = fetch_with_timeout(
-            url,
-            total_timeout=total_timeout,
-            wait_seconds=wait_seconds,
-            capture_console=show_console or only_console,
-            screenshot_path=screenshot_path,
-            width=width,
-            height=height,
-            exec_js=exec_js,
-            post_js=post_js,
-            capture_network=capture_network,
-            type_actions=type_actions if type_actions else None,
-            click_actions=click_actions if click_actions else None,
-            post_wait_seconds=post_wait_seconds,
-            profile_dir=profile_dir,
-        )
+        result = None
+        if args.use_daemon or os.path.exists(DAEMON_SOCKET):
+            try:
+                result = _fetch_via_daemon(url, total_timeout=args.total_timeout, **fetch_kwargs)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Stale socket or no daemon — only an error if it was asked for
+                if args.use_daemon:
+                    raise
+        if result is not None:
+            html, console_logs, network_requests = result
+        else:
+            html, console_logs, network_requests = fetch_with_timeout(
+                url, total_timeout=args.total_timeout, **fetch_kwargs)
 
         if screenshot_path:
             print(f"Screenshot saved to: {screenshot_path}", file=sys.stderr)
 
-        # Determine output
+        # Determine output — collected in one list and written with a single call
+        stdout = sys.stdout.buffer
+        out = []
         if only_screenshot:
             pass
         elif only_network:
             if network_requests:
-                print(format_network_requests(network_requests))
+                format_network_requests(network_requests, out)
             else:
-                print("No network requests captured.")
+                out.append("No network requests captured.\n")
         elif only_console:
             if console_logs:
-                print(format_console_logs(console_logs))
+                format_console_logs(console_logs, out)
             else:
-                print("No console messages captured.")
+                out.append("No console messages captured.\n")
         else:
-            print(html)
+            # The page goes out on its own: joining it into out first would
+            # copy a possibly multi-MB string once more before encoding it
+            stdout.write(html.encode("utf-8", "replace"))
+            out.append("\n")
             if show_console and console_logs:
-                print("\n" + "="*60)
-                print("BROWSER CONSOLE LOGS:")
-                print("="*60)
-                print(format_console_logs(console_logs))
+                out.append("\n" + "="*60 + "\nBROWSER CONSOLE LOGS:\n" + "="*60 + "\n")
+                format_console_logs(console_logs, out)
             if capture_network and network_requests:
-                print("\n" + "="*60)
-                print("NETWORK REQUESTS:")
-                print("="*60)
-                print(format_network_requests(network_requests))
+                out.append("\n" + "="*60 + "\nNETWORK REQUESTS:\n" + "="*60 + "\n")
+                format_network_requests(network_requests, out)
+        if out:
+            stdout.write("".join(out).encode("utf-8", "replace"))
 
     except TimeoutError as e:
         print(f"Timeout: {e}", file=sys.stderr)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Keep warm headless Chromium instances for fetch-rendered.py.
+Usage: js-web-renderer-daemon [options]
+
+Launching Chrome + chromedriver costs several seconds per fetch. The daemon
+keeps warm drivers per launch configuration (viewport, profile and the other
+options fixed at Chrome startup) in fetch-rendered.py's driver pool and serves
+fetches over a Unix socket; fetch-rendered.py uses it automatically while it
+runs.
+
+Options:
+    --socket PATH        Unix socket to listen on
+                         (default: $XDG_RUNTIME_DIR/js-web-renderer.sock)
+    --idle-minutes N     Quit a browser after N minutes without requests (default: 10)
+"""
+import sys
+import os
+import json
+import signal
+import socket
+import socketserver
+import threading
+import time
+import importlib.util
+
+# fetch-rendered.py is not importable by name (hyphen), so load it from its path.
+# realpath() so this also works when started through a symlink.
+_spec = importlib.util.spec_from_file_location(
+    "fetch_rendered",
+    os.path.join(os.path.dirname(os.path.realpath(__file__)), "fetch-rendered.py"),
+)
+fr = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(fr)
+
+# A fetch left with less time than this after waiting for its --profile is
+# failed as timed out rather than started
+MIN_FETCH_SECONDS = 2
+
+
+class _FetchHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in, one JSON response line out."""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            response = self.server.fetch(request)
+        except Exception as e:
+            response = {"error": str(e), "timeout": isinstance(e, TimeoutError)}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class RendererDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves fetches concurrently from fetch-rendered.py's driver pool, which
+    keeps the browsers warm between requests. How many browsers render at once
+    is capped by fetch-rendered.py's JSWR_MAX_CONCURRENCY.
+
+    Fetches with the same --profile run one at a time: a Chrome profile
+    directory can only be opened by one browser.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, idle_seconds):
+        self.idle_seconds = idle_seconds
+        # profile_dir -> [Lock, number of fetches holding or waiting for it];
+        # an entry is dropped when that number is back to 0
+        self._profile_locks = {}
+        self._profile_locks_lock = threading.Lock()
+        super().__init__(socket_path, _FetchHandler)
+
+    def _acquire_profile(self, profile_dir, timeout):
+        """Wait up to timeout seconds until no other fetch uses profile_dir.
+        Returns whether it was acquired; if so, call _release_profile() after."""
+        with self._profile_locks_lock:
+            entry = self._profile_locks.setdefault(profile_dir, [threading.Lock(), 0])
+            entry[1] += 1
+        if entry[0].acquire(timeout=timeout):
+            return True
+        self._release_profile(profile_dir, locked=False)
+        return False
+
+    def _release_profile(self, profile_dir, locked=True):
+        with self._profile_locks_lock:
+            entry = self._profile_locks[profile_dir]
+            if locked:
+                entry[0].release()
+            entry[1] -= 1
+            if not entry[1]:
+                del self._profile_locks[profile_dir]
+
+    def fetch(self, request):
+        url = request.pop("url")
+        total_timeout = request.pop("total_timeout", 60)
+        # Progress lines ([current url], [exec-js result], ...) go back to the
+        # client, which writes them to its stderr
+        log_lines = []
+        profile_dir = request.get("profile_dir")
+        try:
+            if profile_dir:
+                # Waiting for the profile counts against the fetch's deadline,
+                # and must leave the fetch at least MIN_FETCH_SECONDS of it
+                deadline = time.monotonic() + total_timeout
+                if not self._acquire_profile(profile_dir, max(0, total_timeout - MIN_FETCH_SECONDS)):
+                    raise TimeoutError(
+                        f"fetch_rendered() exceeded {total_timeout}s wall-clock timeout for "
+                        f"{url} (profile {profile_dir} busy)")
+                total_timeout = max(0, deadline - time.monotonic())
+            try:
+                html, console_logs, network_requests = fr.fetch_with_timeout(
+                    url, total_timeout=total_timeout, _log=log_lines.append, **request)
+            finally:
+                if profile_dir:
+                    self._release_profile(profile_dir)
+        except Exception as e:
+            return {"error": str(e), "timeout": isinstance(e, TimeoutError), "log": log_lines}
+        return {
+            "html": html,
+            "console_logs": console_logs,
+            "network_requests": network_requests,
+            "log": log_lines,
+        }
+
+    def service_actions(self):
+        # Called by serve_forever() between requests (every poll interval)
+        fr.evict_idle_drivers(self.idle_seconds)
+
+    def server_close(self):
+        fr.drain_driver_pool()
+        super().server_close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ["-h", "--help"]:
+        print(__doc__, file=sys.stderr)
+        sys.exit(0)
+
+    socket_path = fr.DAEMON_SOCKET
+    idle_minutes = 10
+
+    # Parse arguments
+    i = 1
+    while i < len(sys.argv):
+        arg = sys.argv[i]
+        if arg == "--socket" and i + 1 < len(sys.argv):
+            i += 1
+            socket_path = sys.argv[i]
+        elif arg == "--idle-minutes" and i + 1 < len(sys.argv):
+            i += 1
+            idle_minutes = int(sys.argv[i])
+        i += 1
+
+    # Remove a stale socket left by a daemon that did not shut down cleanly
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            print(f"Error: a daemon is already listening on {socket_path}", file=sys.stderr)
+            sys.exit(1)
+        except OSError:
+            os.unlink(socket_path)
+        finally:
+            probe.close()
+
+    server = RendererDaemon(socket_path, idle_minutes * 60)
+    # Turn SIGTERM and SIGHUP into a normal shutdown so the browsers get quit:
+    # they run in their own sessions, where the terminal's signals don't reach
+    for signum in (signal.SIGTERM, signal.SIGHUP):
+        signal.signal(signum, lambda signum, frame: sys.exit(0))
+    print(f"[daemon] listening on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass